@@ -1,191 +1,238 @@
 import math
 import sys
-import random
-import string
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPDF
+from word_search_core import generate_word_search, grid_to_rows
 
 
-def read_phrases_from_file(filename):
+def read_phrases(filename):
     with open(filename, "r") as f:
         content = f.read().splitlines()
-    return sorted([phrase.replace(" ", "") for phrase in content if phrase.strip()], key=len, reverse=True)
+    return [phrase.strip() for phrase in content if phrase.strip()]
 
 
-def generate_grid(rows, cols):
-    return [[' ' for _ in range(cols)] for _ in range(rows)]
+def phrases_to_words(phrases):
+    # generate_word_search orders the words itself, so keep the file order here
+    return [phrase.replace(" ", "") for phrase in phrases]
 
 
-def can_place_word(grid, word, row, col, direction):
-    rows, cols = len(grid), len(grid[0])
-    length = len(word)
-    delta_row, delta_col = direction
+def read_phrases_from_file(filename):
+    return phrases_to_words(read_phrases(filename))
 
-    for i in range(length):
-        r, c = row + i * delta_row, col + i * delta_col
-        if not (0 <= r < rows and 0 <= c < cols) or (grid[r][c] not in (' ', word[i])):
-            return False
-    return True
 
+CELL_SIZE = int(17 * 1.3)  # Scale factor for better spacing
+PX_TO_PT = 72 / 96  # Grid images are laid out in CSS pixels, PDFs in points
 
-def place_word(grid, word, row, col, direction):
-    delta_row, delta_col = direction
-    for i in range(len(word)):
-        grid[row + i * delta_row][col + i * delta_col] = word[i]
 
+def border_rects(width, height, padding):
+    """
+    Returns (x, y, width, height, stroke_width, radius) for the outer and
+    inner border drawn around a grid image of the given size.
+    """
+    # Increase the padding between table and thinner rectangle
+    extra_padding = 8  # Adjust this value to increase/decrease the padding
 
-def fill_empty_spaces(grid):
-    rows, cols = len(grid), len(grid[0])
-    for r in range(rows):
-        for c in range(cols):
-            if grid[r][c] == ' ':
-                grid[r][c] = random.choice(string.ascii_uppercase)
+    # Adjust the grid's x, y, width, and height with extra padding
+    grid_x = padding - 10 - extra_padding
+    grid_y = padding - 10 - extra_padding
+    grid_width = width - 2 * padding + 20 + 2 * extra_padding
+    grid_height = height - 2 * padding + 20 + 2 * extra_padding
+    radius = 20  # Radius for rounded corners
 
+    # The thicker rectangle (outer layer), then the thinner one (inner layer)
+    return [(grid_x, grid_y, grid_width, grid_height, 3, radius),
+            (grid_x + 5, grid_y + 5, grid_width - 10, grid_height - 10, 1, radius)]
 
-def generate_word_search(words, rows=20, cols=20, max_attempts=100, max_retries=100):
-    directions = [(1, 0), (0, 1), (1, 1), (-1, 1),
-                  (1, -1), (-1, -1), (0, -1), (-1, 0)]
 
-    # Sort words by length (longer first)
-    words = sorted(words, key=len, reverse=True)
+def highlight_rects(word_positions, cell_size, padding, angle_precision=0, rect_padding=-2):
+    """
+    Yields (cx, cy, width, height, angle, radius) for the rounded rectangle
+    drawn around each placed word, in image coordinates (y pointing down).
+    """
+    for word, row, col, (dr, dc) in word_positions:
+        word_length = len(word)
+        x_start = col * cell_size + cell_size // 2 + padding
+        y_start = row * cell_size + cell_size // 2 + padding
+        x_end = (col + (word_length - 1) * dc) * \
+            cell_size + cell_size // 2 + padding
+        y_end = (row + (word_length - 1) * dr) * \
+            cell_size + cell_size // 2 + padding
+
+        # Calculate rectangle center
+        cx, cy = (x_start + x_end) / 2, (y_start + y_end) / 2
+
+        # Determine rectangle dimensions and apply negative padding
+        if dr == 0 and dc != 0:  # Horizontal (positive or negative dc)
+            width, height = word_length * cell_size + \
+                rect_padding, cell_size + rect_padding
+            angle = 0
+        elif dr != 0 and dc == 0:  # Vertical (positive or negative dr)
+            width, height = cell_size + rect_padding, word_length * cell_size + rect_padding
+            angle = 0
+        else:  # Diagonal (45° or -45°)
+            # Scale width for diagonal and apply negative padding
+            width = word_length * cell_size * 1.414 + rect_padding
+            height = cell_size + rect_padding
+            angle = 45 if dr > 0 else -45  # Assuming diagonal words are either 45° or -45°
+
+        # Round the angle to the specified precision
+        angle = round(angle, angle_precision)
+
+        radius = cell_size * 0.5  # 50% of cell size for rounded corners
+        yield cx, cy, width, height, angle, radius
+
+
+def build_grid_svg(grid, padding=20):
+    """
+    Returns the SVG elements for the letters and the border, without the
+    enclosing <svg> tag, so the puzzle and the solution can share them.
+    """
+    rows, cols = grid.shape
+    cell_size = CELL_SIZE
+    svg_width = cols * cell_size + 2 * padding
+    svg_height = rows * cell_size + 2 * padding
 
-    for attempt in range(max_retries):
-        grid = generate_grid(rows, cols)
-        word_positions = []
-        unplaced_words = []
+    # Accumulate raw bytes; %-formatting bytes avoids building a str per element
+    svg_content = bytearray()
+    append = svg_content.extend
 
-        for word in words:
-            placed = False
-            attempts = 0
-            # Shuffle directions for better randomness
-            random.shuffle(directions)
+    # Column positions are the same on every row, so they go into one x list
+    # (one x per letter) baked into the row template. Browsers and svglib
+    # place each letter at its own x; MuPDF ignores all but the first and
+    # draws the row as one crowded string. One <text> per letter would
+    # render there too, but brings back rows x cols elements.
+    half = cell_size // 2
+    text_xs = b" ".join(b"%d" % (c * cell_size + padding + half) for c in range(cols))
+    row_ys = [r * cell_size + padding for r in range(rows)]
+    # MuPDF does not inherit text-anchor or font-family from a group, so
+    # those two stay on each row; the size and colour come from the <g>
+    text_template = b"<text x='" + text_xs + b"' y='%d' text-anchor='middle' font-family='Arial'>%s</text>"
 
-            while not placed and attempts < max_attempts:
-                row, col = random.randint(
-                    0, rows - 1), random.randint(0, cols - 1)
-                direction = random.choice(directions)
+    # Draw letters with padding applied, one <text> per row
+    append(b"<g font-size='15' fill='black'>")
+    for y, row_letters in zip(row_ys, grid):
+        append(text_template % (y + half + 5, row_letters.tobytes()))
+    append(b"</g>")
 
-                if can_place_word(grid, word, row, col, direction):
-                    place_word(grid, word, row, col, direction)
-                    word_positions.append((word, row, col, direction))
-                    placed = True
+    for x, y, width, height, stroke_width, radius in border_rects(svg_width, svg_height, padding):
+        append(
+            f"<rect x='{x}' y='{y}' width='{width}' height='{height}' stroke='black' fill='none' stroke-width='{stroke_width}' rx='{radius}' ry='{radius}'/>".encode())
 
-                attempts += 1
+    return bytes(svg_content)
 
-            if not placed:
-                unplaced_words.append(word)
 
-        if not unplaced_words:
-            fill_empty_spaces(grid)
-            return grid, word_positions
+def _svg_number(value):
+    # Hundredths of a pixel are plenty; drops float noise and trailing ".0"
+    return f"{round(value, 2):g}"
 
-    raise ValueError(
-        f"Could not place the following words after {max_retries} attempts: {', '.join(unplaced_words)}")
 
+def build_highlight_svg(word_positions, padding=20, angle_precision=0, rect_padding=-2):
+    """
+    Returns the SVG elements outlining the placed words, drawn on top of
+    build_grid_svg's output for the solution.
+    """
+    # Every outline shares its stroke styling through the enclosing group
+    svg_content = bytearray(b"<g stroke='black' fill='none' stroke-width='0.7'>")
 
-def save_grid_as_svg(grid, filename, word_positions=None, highlight_words=False, padding=20, angle_precision=0, rect_padding=-2):
-    rows = len(grid)
-    cols = len(grid[0])
-    cell_size = int(17 * 1.3)  # Scale factor for better spacing
-    svg_width = cols * cell_size + 2 * padding
-    svg_height = rows * cell_size + 2 * padding
+    # Highlight words using rotated rectangles
+    for cx, cy, width, height, angle, radius in highlight_rects(
+            word_positions, CELL_SIZE, padding, angle_precision, rect_padding):
+        x, y = _svg_number(cx - width / 2), _svg_number(cy - height / 2)
+        radius = _svg_number(radius)
+        # Create rotated rectangle for diagonal words with rounded corners
+        svg_content.extend(
+            f"<g transform='rotate({_svg_number(angle)}, {_svg_number(cx)}, {_svg_number(cy)})'>"
+            f"<rect x='{x}' y='{y}' width='{_svg_number(width)}' height='{_svg_number(height)}' rx='{radius}' ry='{radius}'/>"
+            "</g>".encode())
+
+    svg_content.extend(b"</g>")
+    return bytes(svg_content)
+
+
+def write_svg(filename, grid, *parts, padding=20):
+    rows, cols = grid.shape
+    svg_width = cols * CELL_SIZE + 2 * padding
+    svg_height = rows * CELL_SIZE + 2 * padding
+
+    header = b"<svg xmlns='http://www.w3.org/2000/svg' width='%d' height='%d'>" % (svg_width, svg_height)
+    # Write the parts one after another instead of joining them into one copy first
+    with open(filename, "wb") as f:
+        f.write(header)
+        f.writelines(parts)
+        f.write(b"</svg>")
+    print(f"SVG saved as {filename}")
 
-    svg_content = [
-        "<svg xmlns='http://www.w3.org/2000/svg' width='{}' height='{}'>".format(svg_width, svg_height)]
 
-    # Draw grid and letters with padding applied
-    for r in range(rows):
-        for c in range(cols):
-            x, y = c * cell_size + padding, r * cell_size + padding
-            svg_content.append(
-                "<rect x='{}' y='{}' width='{}' height='{}' stroke='black' fill='white' stroke-opacity='0' rx='5' ry='5'/>".format(x, y, cell_size, cell_size))
-            svg_content.append("<text x='{}' y='{}' font-size='15' text-anchor='middle' fill='black' font-family='Arial'>{}</text>".format(
-                x + cell_size // 2, y + cell_size // 2 + 5, grid[r][c]))
+def save_grid_as_svg(grid, filename, word_positions=None, highlight_words=False, padding=20, angle_precision=0, rect_padding=-2):
+    parts = [build_grid_svg(grid, padding)]
+    if highlight_words and word_positions:
+        parts.append(build_highlight_svg(word_positions, padding, angle_precision, rect_padding))
+    write_svg(filename, grid, *parts, padding=padding)
 
-    # Increase the padding between table and thinner rectangle
-    extra_padding = 8  # Adjust this value to increase/decrease the padding
 
-    # Adjust the grid's x, y, width, and height with extra padding
-    grid_x = padding - 10 - extra_padding
-    grid_y = padding - 10 - extra_padding
-    grid_width = svg_width - 2 * padding + 20 + 2 * extra_padding
-    grid_height = svg_height - 2 * padding + 20 + 2 * extra_padding
-    rx = 20  # Radius for rounded corners
-    ry = 20  # Radius for rounded corners
-
-    # Add the thicker rectangle (outer layer) to the SVG content
-    svg_content.append(
-        "<rect x='{}' y='{}' width='{}' height='{}' stroke='black' fill='none' stroke-width='3' rx='{}' ry='{}'/>".format(
-            grid_x, grid_y, grid_width, grid_height, rx, ry)
-    )
-
-    # Add the thinner rectangle (inner layer) to the SVG content
-    svg_content.append(
-        "<rect x='{}' y='{}' width='{}' height='{}' stroke='black' fill='none' stroke-width='1' rx='{}' ry='{}'/>".format(
-            grid_x + 5, grid_y + 5, grid_width - 10, grid_height - 10, rx, ry)
-    )
+def draw_grid_on_canvas(c, grid, x0, y0, word_positions=None, highlight_words=False, padding=20, scale_factor=1/1):
+    """
+    Draws the grid straight onto a ReportLab canvas, matching the SVG output.
+
+    :param c: Canvas to draw on
+    :param grid: Puzzle grid
+    :param x0: Left edge of the grid image on the page
+    :param y0: Bottom edge of the grid image on the page
+    :param word_positions: Placed words, needed when highlighting
+    :param highlight_words: Whether to outline the placed words
+    :param padding: Space between the image edge and the letters
+    :param scale_factor: Scale factor for the grid image
+    """
+    rows, cols = grid.shape
+    cell_size = CELL_SIZE
+    width = cols * cell_size + 2 * padding
+    height = rows * cell_size + 2 * padding
+    half = cell_size // 2
+
+    c.saveState()
+    c.translate(x0, y0)
+    c.scale(scale_factor * PX_TO_PT, scale_factor * PX_TO_PT)
+
+    # Image coordinates grow downwards, PDF coordinates grow upwards
+    c.setFont("Helvetica", 15)
+    for r, row_letters in enumerate(grid_to_rows(grid)):
+        y = height - (r * cell_size + padding + half + 5)
+        for col, letter in enumerate(row_letters):
+            c.drawCentredString(col * cell_size + padding + half, y, letter)
+
+    for x, y, rect_width, rect_height, stroke_width, radius in border_rects(width, height, padding):
+        c.setLineWidth(stroke_width)
+        c.roundRect(x, height - y - rect_height, rect_width, rect_height, radius)
 
-    # Highlight words using rotated rectangles
     if highlight_words and word_positions:
-        for word, row, col, (dr, dc) in word_positions:
-            word_length = len(word)
-            x_start = col * cell_size + cell_size // 2 + padding
-            y_start = row * cell_size + cell_size // 2 + padding
-            x_end = (col + (word_length - 1) * dc) * \
-                cell_size + cell_size // 2 + padding
-            y_end = (row + (word_length - 1) * dr) * \
-                cell_size + cell_size // 2 + padding
-
-            # Calculate rectangle center
-            cx, cy = (x_start + x_end) / 2, (y_start + y_end) / 2
-
-            # Determine rectangle dimensions and apply negative padding
-            if dr == 0 and dc != 0:  # Horizontal (positive or negative dc)
-                width, height = word_length * cell_size + \
-                    rect_padding, cell_size + rect_padding
-                angle = 0
-            elif dr != 0 and dc == 0:  # Vertical (positive or negative dr)
-                width, height = cell_size + rect_padding, word_length * cell_size + rect_padding
-                angle = 0
-            else:  # Diagonal (45° or -45°)
-                # Scale width for diagonal and apply negative padding
-                width = word_length * cell_size * 1.414 + rect_padding
-                height = cell_size + rect_padding
-                angle = 45 if dr > 0 else -45  # Assuming diagonal words are either 45° or -45°
-
-            # Round the angle to the specified precision
-            angle = round(angle, angle_precision)
-
-            rx = cell_size * 0.5  # 50% of cell size for rounded corners
-            ry = cell_size * 0.5  # 50% of cell size for rounded corners
-
-            # Create rotated rectangle for diagonal words with rounded corners
-            svg_content.append(
-                "<g transform='rotate({}, {}, {})'>"
-                "<rect x='{}' y='{}' width='{}' height='{}' stroke='black' fill='none' stroke-width='0.7' rx='{}' ry='{}'/>"
-                "</g>".format(angle, cx, cy, cx - width / 2,
-                              cy - height / 2, width, height, rx, ry)
-            )
-
-    svg_content.append("</svg>")
-    with open(filename, "w") as f:
-        f.write("\n".join(svg_content))
-    print(f"SVG saved as {filename}")
+        c.setLineWidth(0.7)
+        for cx, cy, rect_width, rect_height, angle, radius in highlight_rects(
+                word_positions, cell_size, padding):
+            c.saveState()
+            c.translate(cx, height - cy)
+            c.rotate(-angle)
+            # SVG clamps the corner radius to half the shorter side
+            radius = min(radius, rect_width / 2, rect_height / 2)
+            c.roundRect(-rect_width / 2, -rect_height / 2, rect_width, rect_height, radius)
+            c.restoreState()
 
+    c.restoreState()
 
-def save_svgs_to_pdf(svg_file1, svg_file2, output_pdf="word_search.pdf", scale_factor=1/1):
+
+def save_grid_to_pdf(grid, word_positions, words, output_pdf="word_search.pdf", scale_factor=1/1, padding=20):
     """
-    Creates a PDF with two SVG images centered and scaled.
+    Creates a PDF with the puzzle on the first page and the solution on the second.
 
-    :param svg_file1: First SVG file to include in the PDF
-    :param svg_file2: Second SVG file to include in the PDF
+    :param grid: Puzzle grid
+    :param word_positions: Placed words, outlined on the solution page
+    :param words: Words to list under the puzzle, as they should be printed
     :param output_pdf: Output PDF filename
-    :param scale_factor: Scale factor for the SVG images
+    :param scale_factor: Scale factor for the grid images
+    :param padding: Space between the image edge and the letters
     """
     c = canvas.Canvas(output_pdf, pagesize=letter)
     page_width, page_height = letter  # Get page dimensions
+    rows, cols = grid.shape
 
     # Add title and description to the first page
     c.setFont("Helvetica-Bold", 16)
@@ -194,47 +241,45 @@ def save_svgs_to_pdf(svg_file1, svg_file2, output_pdf="word_search.pdf", scale_f
     c.drawCentredString(page_width / 2, page_height - 70,
                         "Solve the following puzzle by finding all the hidden words!")
 
-    def draw_svg(svg_file):
-        drawing = svg2rlg(svg_file)  # Load SVG
-
-        # Scale the drawing
-        drawing.width *= scale_factor
-        drawing.height *= scale_factor
-        drawing.scale(scale_factor, scale_factor)
+    def draw_grid(highlight_words):
+        # Calculate the centered position of the scaled grid image
+        width = (cols * CELL_SIZE + 2 * padding) * PX_TO_PT * scale_factor
+        height = (rows * CELL_SIZE + 2 * padding) * PX_TO_PT * scale_factor
+        x = (page_width - width) / 2
+        y = (page_height - height) / 1.5
 
-        # Calculate the centered position
-        x = (page_width - drawing.width) / 2
-        y = (page_height - drawing.height) / 1.5
+        draw_grid_on_canvas(c, grid, x, y, word_positions, highlight_words,
+                            padding, scale_factor)
 
-        # Draw the SVG centered and scaled
-        renderPDF.draw(drawing, c, x, y)
-
-    draw_svg(svg_file1)
+    draw_grid(highlight_words=False)
 
     # Add title for word list
     c.setFont("Helvetica-Bold", 14)
     c.drawCentredString(page_width / 2, 120, "Words List")
 
     c.setFont("Helvetica", 11)
-    # Read words from words.txt and print them with wrapping
-    try:
-        with open("words.txt", "r") as f:
-            words = f.readlines()
-            words = [word.strip() for word in words]
-            max_width = page_width * 0.8
-            y_position = 100  # Adjusted to print after the puzzle
-            line = ""
-            for word in words:
-                if c.stringWidth(line + word, "Helvetica", 11) < max_width:
-                    line += (", " if line else "") + word
-                else:
-                    c.drawCentredString(page_width / 2, y_position, line)
-                    y_position -= 15
-                    line = word
-            if line:
-                c.drawCentredString(page_width / 2, y_position, line)
-    except FileNotFoundError:
-        c.drawCentredString(page_width / 2, 100, "(Word list not found)")
+    # Print the words with wrapping
+    max_width = page_width * 0.8
+    y_position = 100  # Adjusted to print after the puzzle
+    # Measure every word once up front, then wrap in a single pass over the
+    # widths, joining each line only when it is drawn
+    word_widths = [c.stringWidth(word, "Helvetica", 11) for word in words]
+    separator_width = c.stringWidth(", ", "Helvetica", 11)
+    line_words = []
+    line_width = 0
+    for word, word_width in zip(words, word_widths):
+        cost = word_width + (separator_width if line_words else 0)
+        if line_width + cost < max_width:
+            line_words.append(word)
+            line_width += cost
+        else:
+            if line_words:
+                c.drawCentredString(page_width / 2, y_position, ", ".join(line_words))
+                y_position -= 15
+            line_words = [word]
+            line_width = word_width
+    if line_words:
+        c.drawCentredString(page_width / 2, y_position, ", ".join(line_words))
 
     c.showPage()  # Move to the next page
 
@@ -245,7 +290,7 @@ def save_svgs_to_pdf(svg_file1, svg_file2, output_pdf="word_search.pdf", scale_f
     c.drawCentredString(page_width / 2, page_height - 70,
                         "Solve the following puzzle by finding all the hidden words!")
 
-    draw_svg(svg_file2)
+    draw_grid(highlight_words=True)
 
     # Save the PDF
     c.save()
@@ -264,16 +309,20 @@ def main():
         sys.exit(1)
 
     filename = sys.argv[3]  # Read filename from command line
-    words = read_phrases_from_file(filename)
+    # Keep the phrases as written for the printed list; the grid drops the spaces
+    phrases = read_phrases(filename)
+    words = phrases_to_words(phrases)
 
     try:
         puzzle, word_positions = generate_word_search(words, rows, cols)
-        save_grid_as_svg(puzzle, "word_search.svg")
-        save_grid_as_svg(puzzle, "word_search_answers.svg",
-                         word_positions, highlight_words=True)
+        # The solution is the puzzle plus the highlight overlay, so render the grid once
+        grid_svg = build_grid_svg(puzzle)
+        write_svg("word_search.svg", puzzle, grid_svg)
+        write_svg("word_search_answers.svg", puzzle, grid_svg,
+                  build_highlight_svg(word_positions))
         print("Puzzle successfully generated and saved as SVG.")
 
-        save_svgs_to_pdf("word_search.svg", "word_search_answers.svg")
+        save_grid_to_pdf(puzzle, word_positions, phrases)
 
     except ValueError as e:
         print(f"Error: {e}")
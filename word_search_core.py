@@ -0,0 +1,494 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from numba import njit
+
+
+EMPTY = ord(' ')  # Unfilled cells hold an ASCII space
+# (delta_row, delta_col) of the eight directions a word can run in
+_DIRECTIONS = np.array([(1, 0), (0, 1), (1, 1), (-1, 1),
+                        (1, -1), (-1, -1), (0, -1), (-1, 0)], dtype=np.int8)
+# Above this ratio of word letters to grid cells, random placement rarely
+# finds room and generate_word_search starts with _place_by_mrv instead
+_DENSE_GRID_RATIO = 0.8
+# Most (word, direction, start cell) slots _place_by_mrv will track
+_MRV_MAX_SLOTS = 1 << 25
+
+
+def generate_grid(rows, cols):
+    return np.full((rows, cols), EMPTY, dtype=np.uint8)
+
+
+@njit(cache=True)
+def _valid_starts(length, rows, cols, directions):
+    """
+    Returns the directions a word of the given length fits in, as rows of
+    (row_lo, row_hi, col_lo, col_hi, direction index) giving the range of
+    start cells that keep the word inside the grid, and how many there are.
+    """
+    ranges = np.empty((len(directions), 5), dtype=np.int64)
+    span = length - 1
+    fitting = 0
+    for d in range(len(directions)):
+        delta_row, delta_col = directions[d, 0], directions[d, 1]
+        row_lo, row_hi = max(0, -span * delta_row), rows - max(0, span * delta_row)
+        col_lo, col_hi = max(0, -span * delta_col), cols - max(0, span * delta_col)
+        if row_lo < row_hi and col_lo < col_hi:
+            ranges[fitting, 0], ranges[fitting, 1] = row_lo, row_hi
+            ranges[fitting, 2], ranges[fitting, 3] = col_lo, col_hi
+            ranges[fitting, 4] = d
+            fitting += 1
+    return ranges, fitting
+
+
+# The placement kernel works on the flattened grid (cells) plus an occupancy
+# map (cover) counting how many placed words use each cell. The caller
+# guarantees the whole word fits, so consecutive letters are step cells apart.
+
+@njit(cache=True)
+def _try_place_word_inbounds(cells, cover, word, start, step):
+    """
+    Places the word if every cell is free or already holds the same
+    letter, returning whether it was placed.
+    """
+    index = start
+    for i in range(len(word)):
+        # Free cells take any letter, only occupied ones need a letter compare
+        if cover[index] and cells[index] != word[i]:
+            return False
+        index += step
+
+    index = start
+    for i in range(len(word)):
+        cells[index] = word[i]
+        cover[index] += 1
+        index += step
+    return True
+
+
+@njit(cache=True)
+def _remove_word_flat(cells, cover, length, start, step):
+    # Letters shared with other words stay until their last word is removed
+    index = start
+    for _ in range(length):
+        cover[index] -= 1
+        if cover[index] == 0:
+            cells[index] = EMPTY
+        index += step
+
+
+@njit(cache=True)
+def _slot_overlap(cells, cover, word, start, step):
+    # Letters the word would share with placed words, or -1 if it clashes with one
+    overlap = 0
+    index = start
+    for i in range(len(word)):
+        if cover[index]:
+            if cells[index] != word[i]:
+                return -1
+            overlap += 1
+        index += step
+    return overlap
+
+
+def fill_empty_spaces(grid, words=()):
+    """
+    Fills every empty cell with a random letter.
+
+    When words are given, filler letters never complete another copy of
+    any of them. Copies spelled by placed letters alone, such as a word
+    inside a longer placed word, are left as they are.
+    """
+    # Seed from the random module so random.seed() also fixes the filler letters
+    if words:
+        children, terminal, codes = _build_word_trie(words)
+        _fill_avoiding_words(grid, children, terminal, codes, max(len(word) for word in words),
+                             random.getrandbits(32))
+        return
+
+    mask = grid == EMPTY
+    rng = np.random.default_rng(random.getrandbits(64))
+    grid[mask] = rng.integers(
+        ord('A'), ord('Z') + 1, int(mask.sum()), dtype=np.uint8)
+
+
+def _build_word_trie(words):
+    """
+    Returns the words as a trie: children[node, code] is the next node for
+    a letter code (-1 if none), terminal[node] marks the end of a word, and
+    codes maps an ASCII byte to its letter code (-1 if no word uses it).
+    Node 0 is the root.
+    """
+    alphabet = sorted(set("".join(words)))
+    codes = np.full(256, -1, dtype=np.int32)
+    for code, letter in enumerate(alphabet):
+        codes[ord(letter)] = code
+
+    nodes = [{}]
+    for word in words:
+        node = 0
+        for letter in word:
+            if letter not in nodes[node]:
+                nodes[node][letter] = len(nodes)
+                nodes.append({})
+            node = nodes[node][letter]
+        nodes[node][None] = True  # End of word marker
+
+    children = np.full((len(nodes), len(alphabet)), -1, dtype=np.int32)
+    terminal = np.zeros(len(nodes), dtype=np.bool_)
+    for node, edges in enumerate(nodes):
+        for letter, child in edges.items():
+            if letter is None:
+                terminal[node] = True
+            else:
+                children[node, codes[ord(letter)]] = child
+    return children, terminal, codes
+
+
+@njit(cache=True)
+def _trie_child(children, codes, node, letter):
+    code = codes[letter]
+    return children[node, code] if code >= 0 else -1
+
+
+@njit(cache=True)
+def _fill_avoiding_words(grid, children, terminal, codes, max_length, seed):
+    """
+    Fills the empty cells in raster order, choosing uniformly among the
+    letters that do not complete an occurrence of a word in any direction.
+
+    When a cell is filled, every other cell of an occurrence through it is
+    either a placed letter or was filled earlier, so checking at that
+    point catches every accidental occurrence that uses a filler letter.
+
+    For each direction and each start among the letters behind the cell,
+    the trie is walked over those letters, the candidate letter and the
+    letters ahead, so the cost does not grow with the number of words.
+    """
+    random.seed(seed)
+    rows, cols = grid.shape
+    allowed = np.empty(26, dtype=np.bool_)
+
+    for r in range(rows):
+        for c in range(cols):
+            if grid[r, c] != EMPTY:
+                continue
+
+            allowed[:] = True
+            for delta_row in range(-1, 2):
+                for delta_col in range(-1, 2):
+                    if delta_row == 0 and delta_col == 0:
+                        continue
+                    # Letters in place right behind the cell, at most one word length
+                    behind = 0
+                    while behind < max_length - 1:
+                        row, col = r - (behind + 1) * delta_row, c - (behind + 1) * delta_col
+                        if not (0 <= row < rows and 0 <= col < cols) or grid[row, col] == EMPTY:
+                            break
+                        behind += 1
+
+                    # An occurrence through the cell starts k cells behind it
+                    for k in range(behind + 1):
+                        node = 0
+                        for i in range(k, 0, -1):
+                            node = _trie_child(children, codes, node, grid[r - i * delta_row, c - i * delta_col])
+                            if node < 0:
+                                break
+                        if node < 0:
+                            continue
+
+                        for letter in range(26):
+                            if not allowed[letter]:
+                                continue
+                            # Follow the letters in place ahead until a word ends or none matches
+                            n = _trie_child(children, codes, node, ord('A') + letter)
+                            i = 1
+                            while n >= 0 and not terminal[n]:
+                                row, col = r + i * delta_row, c + i * delta_col
+                                if not (0 <= row < rows and 0 <= col < cols) or grid[row, col] == EMPTY:
+                                    break
+                                n = _trie_child(children, codes, n, grid[row, col])
+                                i += 1
+                            if n >= 0 and terminal[n]:
+                                allowed[letter] = False
+
+            count = allowed.sum()
+            if count == 0:
+                # Every letter completes some word; nothing better to do than any letter
+                grid[r, c] = ord('A') + random.randrange(26)
+                continue
+            pick = random.randrange(count)
+            for letter in range(26):
+                if allowed[letter]:
+                    if pick == 0:
+                        grid[r, c] = ord('A') + letter
+                        break
+                    pick -= 1
+
+
+def _encode_words(words):
+    # Flatten the words into one buffer so compiled kernels only see typed arrays
+    word_chars = np.frombuffer("".join(words).encode('ascii'), dtype=np.uint8)
+    word_offsets = np.zeros(len(words) + 1, dtype=np.int32)
+    np.cumsum([len(word) for word in words], out=word_offsets[1:])
+    return word_chars, word_offsets
+
+
+def grid_to_rows(grid):
+    return [row.tobytes().decode('ascii') for row in grid]
+
+
+@njit(cache=True)
+def _try_fill(grid, word_chars, word_offsets, directions, max_attempts, max_backtracks, positions, seed):
+    """
+    Tries to place every word on an empty grid.
+
+    When a word cannot be placed, the most recently placed word is removed
+    and placed again somewhere else (up to max_backtracks times in total)
+    instead of giving up on the whole grid.
+
+    Each word's (row, col, delta_row, delta_col) is written to its row of
+    positions, with row set to -1 when the word could not be placed.
+    Returns the number of words placed.
+    """
+    random.seed(seed)
+    rows, cols = grid.shape
+    cells = grid.reshape(rows * cols)
+    cover = np.zeros(rows * cols, dtype=np.int32)
+    # Flat-index stride of each direction, looked up instead of rebuilt per attempt
+    steps = np.empty(len(directions), dtype=np.int64)
+    for d in range(len(directions)):
+        steps[d] = directions[d, 0] * cols + directions[d, 1]
+    placed_count = 0
+    backtracks = 0
+
+    w = 0
+    while w < len(word_offsets) - 1:
+        word = word_chars[word_offsets[w]:word_offsets[w + 1]]
+        positions[w, 0] = -1
+        # Only sample directions the word fits in, and start cells from which
+        # it stays inside the grid
+        ranges, fitting = _valid_starts(len(word), rows, cols, directions)
+
+        for _ in range(max_attempts if fitting else 0):
+            # Three random bits pick one of eight directions uniformly
+            k = np.int64(random.getrandbits(3)) if fitting == 8 else random.randrange(fitting)
+            row_lo, row_hi, col_lo, col_hi, d = ranges[k, 0], ranges[k, 1], ranges[k, 2], ranges[k, 3], ranges[k, 4]
+            row, col = random.randrange(row_lo, row_hi), random.randrange(col_lo, col_hi)
+            index = row * cols + col
+
+            if _try_place_word_inbounds(cells, cover, word, index, steps[d]):
+                positions[w, 0], positions[w, 1] = row, col
+                positions[w, 2], positions[w, 3] = directions[d, 0], directions[d, 1]
+                placed_count += 1
+                break
+
+        if positions[w, 0] >= 0:
+            w += 1
+        elif w > 0 and backtracks < max_backtracks:
+            # Undo the last placement (LIFO) and place that word again
+            backtracks += 1
+            w -= 1
+            if positions[w, 0] >= 0:
+                _remove_word_flat(cells, cover, word_offsets[w + 1] - word_offsets[w],
+                                  positions[w, 0] * cols + positions[w, 1],
+                                  positions[w, 2] * cols + positions[w, 3])
+                placed_count -= 1
+        else:
+            w += 1
+
+    return placed_count
+
+
+@njit(cache=True)
+def _place_by_mrv(grid, word_chars, word_offsets, directions, positions, seed):
+    """
+    Places the words on an empty grid by enumerating slots (start cell and
+    direction) instead of sampling them, for grids too full for random
+    placement to find room.
+
+    Each unplaced word keeps a flag per slot and a count of the slots still
+    feasible. Each round places the word with the fewest (minimum remaining
+    values), in the slot sharing the most letters with words already
+    placed, which uses up the fewest free cells; ties are broken at random.
+    Writing a letter into a free cell then only rechecks the slots that
+    cross that cell. There is no backtracking: it stops at the first word
+    left without a feasible slot.
+
+    The flags take one byte per word, direction and cell, so the caller
+    keeps that product below _MRV_MAX_SLOTS.
+
+    Fills positions and returns the number of words placed, like _try_fill.
+    """
+    random.seed(seed)
+    rows, cols = grid.shape
+    cells = grid.reshape(rows * cols)
+    cover = np.zeros(rows * cols, dtype=np.int32)
+    steps = np.empty(len(directions), dtype=np.int64)
+    for d in range(len(directions)):
+        steps[d] = directions[d, 0] * cols + directions[d, 1]
+    word_count = len(word_offsets) - 1
+    positions[:, 0] = -1
+    placed_count = 0
+
+    # On the empty grid every in-bounds slot is feasible
+    feasible = np.zeros((word_count, len(directions), rows * cols), dtype=np.bool_)
+    counts = np.zeros(word_count, dtype=np.int64)
+    for w in range(word_count):
+        ranges, fitting = _valid_starts(word_offsets[w + 1] - word_offsets[w], rows, cols, directions)
+        for k in range(fitting):
+            d = ranges[k, 4]
+            for row in range(ranges[k, 0], ranges[k, 1]):
+                feasible[w, d, row * cols + ranges[k, 2]:row * cols + ranges[k, 3]] = True
+            counts[w] += (ranges[k, 1] - ranges[k, 0]) * (ranges[k, 3] - ranges[k, 2])
+
+    for _ in range(word_count):
+        # Most constrained word first
+        best_word = -1
+        for w in range(word_count):
+            if positions[w, 0] < 0 and (best_word < 0 or counts[w] < counts[best_word]):
+                best_word = w
+        if counts[best_word] == 0:
+            break
+
+        # Slot sharing the most letters, chosen uniformly among equally good ones
+        word = word_chars[word_offsets[best_word]:word_offsets[best_word + 1]]
+        ranges, fitting = _valid_starts(len(word), rows, cols, directions)
+        most, ties = -1, 0
+        best_row, best_col, best_d = 0, 0, 0
+        for k in range(fitting):
+            d = ranges[k, 4]
+            for row in range(ranges[k, 0], ranges[k, 1]):
+                for col in range(ranges[k, 2], ranges[k, 3]):
+                    if not feasible[best_word, d, row * cols + col]:
+                        continue
+                    overlap = _slot_overlap(cells, cover, word, row * cols + col, steps[d])
+                    if overlap < most:
+                        continue
+                    if overlap > most:
+                        most, ties = overlap, 0
+                    ties += 1
+                    if random.randrange(ties) == 0:
+                        best_row, best_col, best_d = row, col, d
+
+        _try_place_word_inbounds(cells, cover, word, best_row * cols + best_col, steps[best_d])
+        positions[best_word, 0], positions[best_word, 1] = best_row, best_col
+        positions[best_word, 2], positions[best_word, 3] = directions[best_d, 0], directions[best_d, 1]
+        placed_count += 1
+
+        # Letters written into free cells rule out the slots that need another letter there
+        for i in range(len(word)):
+            r, c = best_row + i * directions[best_d, 0], best_col + i * directions[best_d, 1]
+            if cover[r * cols + c] != 1:
+                continue
+            for w in range(word_count):
+                if positions[w, 0] >= 0:
+                    continue
+                other = word_chars[word_offsets[w]:word_offsets[w + 1]]
+                for d in range(len(directions)):
+                    for j in range(len(other)):
+                        if other[j] == word[i]:
+                            continue
+                        row, col = r - j * directions[d, 0], c - j * directions[d, 1]
+                        if 0 <= row < rows and 0 <= col < cols and feasible[w, d, row * cols + col]:
+                            feasible[w, d, row * cols + col] = False
+                            counts[w] -= 1
+
+    return placed_count
+
+
+def _place_words(word_chars, word_offsets, rows, cols, max_attempts, max_backtracks, seed):
+    # One placement pass on a fresh grid, at module level so worker processes can run it
+    grid = generate_grid(rows, cols)
+    positions = np.empty((len(word_offsets) - 1, 4), dtype=np.int32)
+    placed_count = _try_fill(grid, word_chars, word_offsets, _DIRECTIONS, max_attempts,
+                             max_backtracks, positions, seed)
+    return grid, positions, placed_count
+
+
+def _place_words_by_mrv(word_chars, word_offsets, rows, cols, seed):
+    grid = generate_grid(rows, cols)
+    positions = np.empty((len(word_offsets) - 1, 4), dtype=np.int32)
+    placed_count = _place_by_mrv(grid, word_chars, word_offsets, _DIRECTIONS, positions, seed)
+    return grid, positions, placed_count
+
+
+def _place_words_in_pool(word_chars, word_offsets, rows, cols, max_attempts, max_backtracks,
+                         max_retries, workers):
+    """
+    Runs the retry passes across worker processes and returns the first
+    pass (in submission order) that placed every word, or the last one.
+
+    Each pass gets its own child of one SeedSequence, so the passes draw
+    independent streams and random.seed() still fixes the outcome.
+
+    Success only cancels the passes that have not started yet; the pool
+    still waits for the ones already running before this returns. The
+    caller needs at least two passes and two workers to make a pool
+    worthwhile.
+    """
+    seed_sequence = np.random.SeedSequence(random.getrandbits(128))
+    seeds = [int(child.generate_state(1)[0]) for child in seed_sequence.spawn(max_retries)]
+
+    with ProcessPoolExecutor(max_workers=min(workers, max_retries)) as executor:
+        futures = [executor.submit(_place_words, word_chars, word_offsets, rows, cols,
+                                   max_attempts, max_backtracks, seed)
+                   for seed in seeds]
+        # Results are read in submission order, not completion order, so the
+        # chosen grid does not depend on which worker happens to finish first
+        for future in futures:
+            grid, positions, placed_count = future.result()
+            if placed_count == len(word_offsets) - 1:
+                break
+        for future in futures:
+            future.cancel()
+    return grid, positions, placed_count
+
+
+def generate_word_search(words, rows=20, cols=20, max_attempts=100, max_retries=10, max_backtracks=5000,
+                         workers=1):
+    # Sort words by length (longer first)
+    words = sorted(words, key=len, reverse=True)
+    word_chars, word_offsets = _encode_words(words)
+    positions = np.full((len(words), 4), -1, dtype=np.int32)
+    placed_count = 0
+
+    mrv_fits = len(words) * len(_DIRECTIONS) * rows * cols <= _MRV_MAX_SLOTS
+    dense = mrv_fits and sum(len(word) for word in words) > _DENSE_GRID_RATIO * rows * cols
+    if dense:
+        # Random sampling rarely finds room on a near-full grid, so enumerate
+        # slots instead, retrying with fresh tie-breaking
+        for attempt in range(max_retries):
+            grid, positions, placed_count = _place_words_by_mrv(
+                word_chars, word_offsets, rows, cols, random.getrandbits(32))
+            if placed_count == len(words):
+                break
+    elif min(workers, max_retries) > 1:
+        # The retries run side by side in a process pool, which pays off for
+        # tight grids where most passes fail
+        grid, positions, placed_count = _place_words_in_pool(
+            word_chars, word_offsets, rows, cols, max_attempts, max_backtracks, max_retries, workers)
+    else:
+        grid = generate_grid(rows, cols)
+        for attempt in range(max_retries):
+            grid.fill(EMPTY)
+            # Seed the kernel from the random module so random.seed() still controls the result
+            placed_count = _try_fill(grid, word_chars, word_offsets, _DIRECTIONS, max_attempts,
+                                     max_backtracks, positions, random.getrandbits(32))
+            if placed_count == len(words):
+                break
+
+    # Last resort before giving up: slot enumeration often fits what sampling could not
+    if placed_count < len(words) and mrv_fits and not dense:
+        grid, positions, placed_count = _place_words_by_mrv(
+            word_chars, word_offsets, rows, cols, random.getrandbits(32))
+
+    if placed_count == len(words):
+        fill_empty_spaces(grid, words)
+        word_positions = [(word, int(row), int(col), (int(dr), int(dc)))
+                          for word, (row, col, dr, dc) in zip(words, positions)]
+        return grid, word_positions
+
+    unplaced_words = [word for word, position in zip(words, positions) if position[0] < 0]
+    raise ValueError(
+        f"Could not place the following words after {max_retries} attempts: {', '.join(unplaced_words)}")